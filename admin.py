@@ -5,7 +5,26 @@ Community E-Library System - Admin Interface
 Contains all admin-related functionality and interface methods
 """
 
-from storage import User
+import sys
+from itertools import islice
+
+# Separator printed between entries in user listings
+_HR = "-" * 30
+
+_DASHBOARD_MENU = (
+    "\n1. Add New Resource\n"
+    "2. Edit Existing Resource\n"
+    "3. Manage Users\n"
+    "4. View Usage Report\n"
+    "5. Logout\n"
+)
+
+_USERS_MENU = (
+    "1. View All Users\n"
+    "2. Add New Admin\n"
+    "3. Remove User\n"
+    "4. Return to Dashboard\n"
+)
 
 class AdminInterface:
     """Admin interface functionality for the library system"""
@@ -13,6 +32,17 @@ class AdminInterface:
     def __init__(self, library, cli_helper):
         self.library = library
         self.cli = cli_helper
+        self._dashboard_actions = {
+            1: self.add_new_resource,
+            2: self.edit_resource,
+            3: self.manage_users,
+            4: self.view_usage_report,
+        }
+        self._user_actions = {
+            1: self.view_all_users,
+            2: self.add_new_admin,
+            3: self.remove_user,
+        }
     
     def admin_interface(self):
         """Handle admin interface"""
@@ -41,56 +71,40 @@ class AdminInterface:
             self.cli.clear_screen()
             self.cli.display_header("Admin Dashboard")
             
-            print(f"Logged in as: {self.library.current_user.username}")
-            print("\n1. Add New Resource")
-            print("2. Edit Existing Resource")
-            print("3. Manage Users")
-            print("4. View Usage Report")
-            print("5. Logout")
+            sys.stdout.write(f"Logged in as: {self.library.current_user.username}\n{_DASHBOARD_MENU}")
             
-            choice = self.cli.get_input("\nEnter your choice: ", int)
+            logout_choice = len(self._dashboard_actions) + 1
+            choice = self.cli.get_choice("\nEnter your choice: ", range(1, logout_choice + 1))
             
-            if choice == 1:
-                self.add_new_resource()
-            elif choice == 2:
-                self.edit_resource()
-            elif choice == 3:
-                self.manage_users()
-            elif choice == 4:
-                self.view_usage_report()
-            elif choice == 5:
+            if choice == logout_choice:
                 self.library.logout()
                 break
-            else:
-                print("Invalid choice.")
-                input("Press Enter to continue...")
+            self._dashboard_actions[choice]()
     
     def add_new_resource(self):
         """Add a new resource"""
         self.cli.clear_screen()
         self.cli.display_header("Add New Resource")
         
-        title = input("Enter Title: ")
-        author = input("Enter Author: ")
-        subject = input("Enter Subject: ")
-        language = input("Enter Language: ")
-        file_path = input("Enter File Path/URL: ")
-        description = input("Enter Description (optional): ")
+        title, author, subject, language, file_path, description = self.cli.get_multi_input([
+            ("Enter Title", None),
+            ("Enter Author", None),
+            ("Enter Subject", None),
+            ("Enter Language", None),
+            ("Enter File Path/URL", None),
+            ("Enter Description (optional)", None),
+        ])
         
         print("\nSelect Category:")
-        for i, category in enumerate(self.library.categories, 1):
-            print(f"{i}. {category}")
+        print(self.library.categories_menu)
         
-        cat_choice = self.cli.get_input("Enter category number: ", int)
+        cat_choice = self.cli.get_choice("Enter category number: ",
+                                         range(1, len(self.library.categories) + 1))
+        category = self.library.categories[cat_choice - 1]
         
-        if 1 <= cat_choice <= len(self.library.categories):
-            category = self.library.categories[cat_choice - 1]
-            
-            resource_id = self.library.add_resource(title, author, subject, language, 
-                                                  file_path, category, description)
-            print(f"\nResource added successfully! ID: {resource_id}")
-        else:
-            print("Invalid category selection.")
+        resource_id = self.library.add_resource(title, author, subject, language, 
+                                              file_path, category, description)
+        print(f"\nResource added successfully! ID: {resource_id}")
         
         input("Press Enter to continue...")
     
@@ -104,37 +118,35 @@ class AdminInterface:
             input("Press Enter to continue...")
             return
         
-        resources = list(self.library.resources.values())
-        for i, resource in enumerate(resources, 1):
-            print(f"{i}. {resource.title} by {resource.author}")
+        resources = self.library.resources.values()
+        self.cli.paginate(f"{i}. {resource.title} by {resource.author}\n"
+                          for i, resource in enumerate(resources, 1))
         
-        choice = self.cli.get_input(f"\nSelect resource to edit (1-{len(resources)}): ", int)
+        choice = self.cli.get_choice(f"\nSelect resource to edit (1-{len(resources)}): ",
+                                     range(1, len(resources) + 1))
+        resource = next(islice(resources, choice - 1, None))
         
-        if 1 <= choice <= len(resources):
-            resource = resources[choice - 1]
-            
-            print(f"\nEditing: {resource.title}")
-            print("Press Enter to keep current value")
-            
-            new_title = input(f"Title [{resource.title}]: ") or resource.title
-            new_author = input(f"Author [{resource.author}]: ") or resource.author
-            new_subject = input(f"Subject [{resource.subject}]: ") or resource.subject
-            new_language = input(f"Language [{resource.language}]: ") or resource.language
-            new_file_path = input(f"File Path [{resource.file_path}]: ") or resource.file_path
-            new_description = input(f"Description [{resource.description}]: ") or resource.description
-            
-            # Update resource
-            resource.title = new_title
-            resource.author = new_author
-            resource.subject = new_subject
-            resource.language = new_language
-            resource.file_path = new_file_path
-            resource.description = new_description
-            
-            self.library.save_data()
-            print("Resource updated successfully!")
-        else:
-            print("Invalid selection.")
+        print(f"\nEditing: {resource.title}")
+        print("Press Enter to keep current value")
+        
+        (new_title, new_author, new_subject, new_language,
+         new_file_path, new_description) = self.cli.get_multi_input([
+            ("Title", resource.title),
+            ("Author", resource.author),
+            ("Subject", resource.subject),
+            ("Language", resource.language),
+            ("File Path", resource.file_path),
+            ("Description", resource.description),
+        ])
+        
+        self.library.update_resource(resource.id,
+                                     title=new_title,
+                                     author=new_author,
+                                     subject=new_subject,
+                                     language=new_language,
+                                     file_path=new_file_path,
+                                     description=new_description)
+        print("Resource updated successfully!")
         
         input("Press Enter to continue...")
     
@@ -144,51 +156,45 @@ class AdminInterface:
             self.cli.clear_screen()
             self.cli.display_header("Manage Users")
             
-            print("1. View All Users")
-            print("2. Add New Admin")
-            print("3. Remove User")
-            print("4. Return to Dashboard")
+            sys.stdout.write(_USERS_MENU)
             
-            choice = self.cli.get_input("\nEnter your choice: ", int)
+            return_choice = len(self._user_actions) + 1
+            choice = self.cli.get_choice("\nEnter your choice: ", range(1, return_choice + 1))
             
-            if choice == 1:
-                self.view_all_users()
-            elif choice == 2:
-                self.add_new_admin()
-            elif choice == 3:
-                self.remove_user()
-            elif choice == 4:
+            if choice == return_choice:
                 break
-            else:
-                print("Invalid choice.")
-                input("Press Enter to continue...")
+            self._user_actions[choice]()
     
     def view_all_users(self):
         """View all registered users"""
         self.cli.clear_screen()
         self.cli.display_header("All Users")
         
-        students = [user for user in self.library.users.values() if user.role == 'student']
-        admins = [user for user in self.library.users.values() if user.role == 'admin']
+        students = self.library.get_users_by_role('student')
+        admins = self.library.get_users_by_role('admin')
         
-        print(f"Total Students: {len(students)}")
-        print(f"Total Admins: {len(admins)}")
-        print("\n--- Students ---")
+        sys.stdout.write(f"Total Students: {len(students)}\n"
+                         f"Total Admins: {len(admins)}\n"
+                         "\n--- Students ---\n")
         
-        for user in students:
-            favorites_count = len(user.favorites)
-            history_count = len(user.reading_history)
-            print(f"Username: {user.username}")
-            print(f"Email: {user.email}")
-            print(f"Favorites: {favorites_count} | Reading History: {history_count}")
-            print(f"Joined: {user.created_at[:10]}")
-            print("-" * 30)
+        student_rows = (
+            f"Username: {user.username}\n"
+            f"Email: {user.email}\n"
+            f"Favorites: {len(user.favorites)} | Reading History: {len(user.reading_history)}\n"
+            f"Joined: {user.created_at_short}\n"
+            f"{_HR}\n"
+            for user in students
+        )
         
-        print("\n--- Admins ---")
-        for user in admins:
-            print(f"Username: {user.username}")
-            print(f"Email: {user.email}")
-            print("-" * 30)
+        if self.cli.paginate(student_rows):
+            print("\n--- Admins ---")
+            admin_rows = (
+                f"Username: {user.username}\n"
+                f"Email: {user.email}\n"
+                f"{_HR}\n"
+                for user in admins
+            )
+            self.cli.paginate(admin_rows)
         
         input("Press Enter to continue...")
     
@@ -201,10 +207,7 @@ class AdminInterface:
         password = input("Enter admin password: ")
         email = input("Enter admin email: ")
         
-        if username not in self.library.users:
-            admin = User(username, password, email, "admin")
-            self.library.users[username] = admin
-            self.library.save_data()
+        if self.library.add_admin(username, password, email):
             print("Admin user created successfully!")
         else:
             print("Username already exists.")
@@ -212,21 +215,25 @@ class AdminInterface:
         input("Press Enter to continue...")
     
     def remove_user(self):
-        """Remove a user"""
+        """Remove one or more users"""
         self.cli.clear_screen()
         self.cli.display_header("Remove User")
         
-        username = input("Enter username to remove: ")
+        usernames = input("Enter username(s) to remove (separate with commas): ")
+        usernames = [username.strip() for username in usernames.split(',') if username.strip()]
         
-        if username in self.library.users:
-            if username == self.library.current_user.username:
-                print("Cannot remove currently logged in admin.")
-            else:
-                del self.library.users[username]
-                self.library.save_data()
-                print(f"User '{username}' removed successfully!")
-        else:
-            print("User not found.")
+        current_username = self.library.current_user.username
+        if current_username in usernames:
+            print("Cannot remove currently logged in admin.")
+            usernames = [username for username in usernames if username != current_username]
+        
+        removed = self.library.remove_users(usernames)
+        for username in removed:
+            print(f"User '{username}' removed successfully!")
+        
+        not_found = [username for username in usernames if username not in removed]
+        if not_found:
+            print(f"User not found: {', '.join(not_found)}")
         
         input("Press Enter to continue...")
     
@@ -237,15 +244,18 @@ class AdminInterface:
         
         report = self.library.get_usage_report()
         
-        print(f"Total Resources: {report['total_resources']}")
-        print(f"Total Students: {report['total_users']}")
-        
-        print("\n--- Most Downloaded Resources ---")
-        for i, resource in enumerate(report['most_downloaded'], 1):
-            print(f"{i}. {resource.title} - {resource.download_count} downloads")
-        
-        print("\n--- Most Viewed Resources ---")
-        for i, resource in enumerate(report['most_viewed'], 1):
-            print(f"{i}. {resource.title} - {resource.view_count} views")
+        lines = [
+            f"Total Resources: {report['total_resources']}",
+            f"Total Students: {report['total_users']}",
+            "",
+            "--- Most Downloaded Resources ---",
+        ]
+        lines.extend(f"{i}. {resource.title} - {resource.download_count} downloads"
+                     for i, resource in enumerate(report['most_downloaded'], 1))
+        lines.append("")
+        lines.append("--- Most Viewed Resources ---")
+        lines.extend(f"{i}. {resource.title} - {resource.view_count} views"
+                     for i, resource in enumerate(report['most_viewed'], 1))
+        sys.stdout.write("\n".join(lines) + "\n")
         
         input("Press Enter to continue...")
\ No newline at end of file
@@ -5,16 +5,31 @@ Contains the main CLI functionality and interface coordination
 """
 
 import os
+import sys
+from itertools import islice
 from storage import ELibrary
-from student import StudentInterface
-from admin import AdminInterface
+
+# ANSI escape sequence: clear the screen and move the cursor home
+CLEAR_SCREEN = "\x1b[2J\x1b[H"
+
+ROLE_MENU = (
+    "\nAre you a:\n"
+    "1. Student\n"
+    "2. Admin\n"
+    "3. Exit\n"
+)
+
+if os.name == 'nt':
+    # Running an empty command once turns on ANSI escape handling in the Windows console
+    os.system('')
 
 class CLIHelper:
     """Helper class for CLI operations"""
     
     def clear_screen(self):
         """Clear the terminal screen"""
-        os.system('cls' if os.name == 'nt' else 'clear')
+        sys.stdout.write(CLEAR_SCREEN)
+        sys.stdout.flush()
     
     def display_header(self, title: str):
         """Display a formatted header"""
@@ -32,6 +47,37 @@ class CLIHelper:
                 return value
             except ValueError:
                 print("Invalid input. Please try again.")
+    
+    def get_choice(self, prompt: str, valid: range) -> int:
+        """Get a menu choice, re-prompting until it is a number in the valid range"""
+        while True:
+            value = input(prompt).strip()
+            if value.isdecimal():
+                choice = int(value)
+                if choice in valid:
+                    return choice
+            print("Invalid choice. Please try again.")
+    
+    def get_multi_input(self, fields):
+        """Prompt for (label, current) fields, keeping current values left blank"""
+        values = []
+        for label, current in fields:
+            if current is None:
+                values.append(input(f"{label}: "))
+            else:
+                values.append(input(f"{label} [{current}]: ") or current)
+        return values
+    
+    def paginate(self, rows, page_size: int = 20) -> bool:
+        """Write pre-formatted rows a page at a time; returns False if the user quits"""
+        rows = iter(rows)
+        page = list(islice(rows, page_size))
+        while page:
+            sys.stdout.write("".join(page))
+            page = list(islice(rows, page_size))
+            if page and input("[N]ext page / [Q]uit: ").strip().upper() == 'Q':
+                return False
+        return True
 
 class ELibraryInterface:
     """Main interface class that coordinates all CLI operations"""
@@ -39,28 +85,39 @@ class ELibraryInterface:
     def __init__(self):
         self.library = ELibrary()
         self.cli_helper = CLIHelper()
-        self.student_interface = StudentInterface(self.library, self.cli_helper)
-        self.admin_interface = AdminInterface(self.library, self.cli_helper)
+        # Student and admin interfaces are imported and built on first use
+        self.student_interface = None
+        self.admin_interface = None
+        self._menu_actions = {
+            1: self.open_student_interface,
+            2: self.open_admin_interface,
+        }
+    
+    def open_student_interface(self):
+        """Enter the student interface, loading it on first use"""
+        if self.student_interface is None:
+            from student import StudentInterface
+            self.student_interface = StudentInterface(self.library, self.cli_helper)
+        self.student_interface.student_interface()
+    
+    def open_admin_interface(self):
+        """Enter the admin interface, loading it on first use"""
+        if self.admin_interface is None:
+            from admin import AdminInterface
+            self.admin_interface = AdminInterface(self.library, self.cli_helper)
+        self.admin_interface.admin_interface()
     
     def start(self):
         """Main entry point"""
         while True:
             self.cli_helper.clear_screen()
             self.cli_helper.display_header("Welcome to the Community E-Library")
-            print("\nAre you a:")
-            print("1. Student")
-            print("2. Admin")
-            print("3. Exit")
+            sys.stdout.write(ROLE_MENU)
             
-            choice = self.cli_helper.get_input("\nEnter your choice: ", int)
+            exit_choice = len(self._menu_actions) + 1
+            choice = self.cli_helper.get_choice("\nEnter your choice: ", range(1, exit_choice + 1))
             
-            if choice == 1:
-                self.student_interface.student_interface()
-            elif choice == 2:
-                self.admin_interface.admin_interface()
-            elif choice == 3:
+            if choice == exit_choice:
                 print("Thank you for using Community E-Library!")
                 break
-            else:
-                print("Invalid choice. Please try again.")
-                input("Press Enter to continue...")
\ No newline at end of file
+            self._menu_actions[choice]()
\ No newline at end of file
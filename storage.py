@@ -4,46 +4,113 @@ Community E-Library System - Storage and Data Models
 Contains User, Resource classes and ELibrary storage management
 """
 
+import atexit
 import json
 import os
 import datetime
 from typing import Dict, List, Optional
 import hashlib
-import subprocess
-import platform
-import shutil
-import webbrowser
+import hmac
+import heapq
+from operator import attrgetter
+import queue
+import secrets
+import threading
+import time
 from urllib.parse import urlparse
 
+try:
+    import orjson
+except ImportError:  # orjson is optional; the standard library json is used without it
+    orjson = None
+
+def _dumps(data) -> bytes:
+    """Serialize data to compact JSON bytes"""
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, separators=(',', ':')).encode()
+
+def _loads(raw: bytes):
+    """Parse JSON bytes"""
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+def _is_url(path: str) -> bool:
+    """Check if a path is a URL"""
+    try:
+        result = urlparse(path)
+        return all([result.scheme, result.netloc])
+    except:
+        return False
+
+class _SafeFilenameChars(dict):
+    """str.translate table that drops characters not allowed in generated filenames"""
+    
+    def __missing__(self, codepoint: int):
+        char = chr(codepoint)
+        self[codepoint] = char if char.isalnum() or char in (' ', '-', '_') else None
+        return self[codepoint]
+
+_SAFE_FILENAME_CHARS = _SafeFilenameChars()
+
 class User:
     """User class for managing library users"""
     
+    __slots__ = ('username', 'password', 'salt', 'scrypt_params', 'email', 'role', 'favorites',
+                 'reading_history', 'created_at', 'created_at_short')
+    
+    # scrypt cost (n, r, p) for newly set passwords; every hash keeps the cost it was made with
+    SCRYPT_PARAMS = (2**14, 8, 1)
+    
+    # Cost of salted hashes saved before the cost was stored with them
+    _ORIGINAL_SCRYPT_PARAMS = (2**14, 8, 1)
+    
     def __init__(self, username: str, password: str, email: str = "", role: str = "student"):
         self.username = username
-        self.password = self._hash_password(password)
+        self.set_password(password)
         self.email = email
         self.role = role
-        self.favorites = []
-        self.reading_history = []
+        # Dict keys act as insertion-ordered sets of resource IDs
+        self.favorites = {}
+        self.reading_history = {}
         self.created_at = datetime.datetime.now().isoformat()
+        self.created_at_short = self.created_at[:10]
     
-    def _hash_password(self, password: str) -> str:
-        """Hash password using SHA256"""
-        return hashlib.sha256(password.encode()).hexdigest()
+    def _hash_password(self, password: str, salt: str, scrypt_params: tuple) -> str:
+        """Hash password with scrypt, or unsalted SHA256 for accounts saved before salts"""
+        if not salt:
+            return hashlib.sha256(password.encode()).hexdigest()
+        n, r, p = scrypt_params
+        return hashlib.scrypt(password.encode(), salt=bytes.fromhex(salt),
+                              n=n, r=r, p=p, maxmem=256 * r * (n + p), dklen=32).hex()
+    
+    def set_password(self, password: str):
+        """Store a salted hash of a new password at the current scrypt cost"""
+        self.salt = os.urandom(16).hex()
+        self.scrypt_params = self.SCRYPT_PARAMS
+        self.password = self._hash_password(password, self.salt, self.scrypt_params)
+    
+    def needs_rehash(self) -> bool:
+        """Check whether the stored hash is unsalted or made at an outdated scrypt cost"""
+        return not self.salt or self.scrypt_params != self.SCRYPT_PARAMS
     
     def verify_password(self, password: str) -> bool:
         """Verify password against stored hash"""
-        return self.password == self._hash_password(password)
+        return hmac.compare_digest(self.password,
+                                   self._hash_password(password, self.salt, self.scrypt_params))
     
     def to_dict(self):
         """Convert user to dictionary for JSON serialization"""
         return {
             'username': self.username,
             'password': self.password,
+            'salt': self.salt,
+            'scrypt_params': list(self.scrypt_params),
             'email': self.email,
             'role': self.role,
-            'favorites': self.favorites,
-            'reading_history': self.reading_history,
+            'favorites': list(self.favorites),
+            'reading_history': list(self.reading_history),
             'created_at': self.created_at
         }
     
@@ -53,16 +120,23 @@ class User:
         user = cls.__new__(cls)
         user.username = data['username']
         user.password = data['password']
+        user.salt = data.get('salt', '')
+        user.scrypt_params = tuple(data.get('scrypt_params') or cls._ORIGINAL_SCRYPT_PARAMS)
         user.email = data.get('email', '')
         user.role = data.get('role', 'student')
-        user.favorites = data.get('favorites', [])
-        user.reading_history = data.get('reading_history', [])
-        user.created_at = data.get('created_at', datetime.datetime.now().isoformat())
+        user.favorites = dict.fromkeys(data.get('favorites', []))
+        user.reading_history = dict.fromkeys(data.get('reading_history', []))
+        user.created_at = data.get('created_at') or datetime.datetime.now().isoformat()
+        user.created_at_short = user.created_at[:10]
         return user
 
 class Resource:
     """Resource class for managing library resources"""
     
+    __slots__ = ('id', 'title', 'author', 'subject', 'language', 'file_path', 'category',
+                 'description', 'download_count', 'view_count', 'added_date',
+                 'search_text', 'is_remote')
+    
     def __init__(self, title: str, author: str, subject: str, language: str, 
                  file_path: str, category: str = "Core Subjects", description: str = ""):
         self.id = self._generate_id()
@@ -76,10 +150,19 @@ class Resource:
         self.download_count = 0
         self.view_count = 0
         self.added_date = datetime.datetime.now().isoformat()
+        self.refresh_cached_fields()
+    
+    def refresh_cached_fields(self):
+        """Cache the keyword search string and whether the file path is a URL"""
+        # Fields are joined on a newline, which typed keywords cannot contain,
+        # so a match never spans two fields
+        self.search_text = "\n".join((self.title, self.author,
+                                       self.subject, self.language)).lower()
+        self.is_remote = _is_url(self.file_path)
     
     def _generate_id(self) -> str:
         """Generate unique ID for resource"""
-        return hashlib.md5(f"{datetime.datetime.now().isoformat()}".encode()).hexdigest()[:8]
+        return secrets.token_hex(4)
     
     def to_dict(self):
         """Convert resource to dictionary for JSON serialization"""
@@ -111,132 +194,357 @@ class Resource:
         resource.description = data.get('description', '')
         resource.download_count = data.get('download_count', 0)
         resource.view_count = data.get('view_count', 0)
-        resource.added_date = data.get('added_date', datetime.datetime.now().isoformat())
+        resource.added_date = data.get('added_date') or datetime.datetime.now().isoformat()
+        resource.refresh_cached_fields()
         return resource
 
 class ELibrary:
     """Main library class for managing users, resources and data persistence"""
     
-    def __init__(self):
+    # Number of resources tracked for the most downloaded/viewed rankings
+    TOP_K = 10
+    
+    # Bytes read at a time when streaming a download to disk
+    DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+    
+    # Distinct keywords whose results are kept between catalog changes
+    SEARCH_CACHE_SIZE = 128
+    
+    # Longest time, in seconds, that changes stay unsaved without a flush
+    AUTOSAVE_INTERVAL = 5.0
+    
+    def __init__(self, data_file: str = 'library_data.json'):
         self.users = {}
+        self._user_index = {'student': [], 'admin': []}
         self.resources = {}
+        self._top_downloads = []
+        self._top_views = []
+        # Catalog position of each resource, used to break ranking ties in insertion order
+        self._resource_order = {}
+        self._stats_version = 0
+        self._usage_report = None
+        self._catalog_version = 0
+        self._category_index = None
+        self._search_index = None
+        self._search_cache = None
         self.current_user = None
-        self.data_file = 'library_data.json'
+        self.data_file = data_file
+        # Downloads are kept next to the data file
+        self.downloads_dir = os.path.join(os.path.dirname(os.path.abspath(data_file)), "downloads")
+        self._dirty = False
+        self._last_save = time.monotonic()
+        self._write_queue = queue.Queue(maxsize=1)
+        # Held while a snapshot is taken and queued, by either thread
+        self._save_lock = threading.Lock()
+        self._writer = None
+        self._file_opener = None
         self.categories = [
             "Core Subjects",
             "Local Storybooks", 
             "Study Skills",
             "Exam Guides"
         ]
+        self.categories_menu = "\n".join(f"{i}. {category}"
+                                         for i, category in enumerate(self.categories, 1))
         self.load_data()
         self._create_default_admin()
+        atexit.register(self.flush)
     
     def _create_default_admin(self):
         """Create default admin user if none exists"""
-        admin_exists = any(user.role == 'admin' for user in self.users.values())
-        if not admin_exists:
-            admin = User("admin", "admin123", "admin@library.com", "admin")
-            self.users["admin"] = admin
+        if not self._user_index['admin']:
+            self._add_user(User("admin", "admin123", "admin@library.com", "admin"))
             self.save_data()
             print("Default admin created - Username: admin, Password: admin123")
     
     def load_data(self):
         """Load data from JSON file"""
-        if os.path.exists(self.data_file):
-            try:
-                with open(self.data_file, 'r') as f:
-                    data = json.load(f)
-                    
-                # Load users
-                for username, user_data in data.get('users', {}).items():
-                    self.users[username] = User.from_dict(user_data)
+        try:
+            with open(self.data_file, 'rb') as f:
+                data = _loads(f.read())
                 
-                # Load resources
-                for resource_id, resource_data in data.get('resources', {}).items():
-                    self.resources[resource_id] = Resource.from_dict(resource_data)
-                    
-            except (json.JSONDecodeError, KeyError) as e:
-                print(f"Error loading data: {e}")
-                print("Starting with empty library...")
+            # Load users
+            for user_data in data.get('users', {}).values():
+                self._add_user(User.from_dict(user_data))
+            
+            # Load resources
+            for resource_id, resource_data in data.get('resources', {}).items():
+                self.resources[resource_id] = Resource.from_dict(resource_data)
+                
+        except FileNotFoundError:
+            pass
+        except (json.JSONDecodeError, KeyError) as e:
+            print(f"Error loading data: {e}")
+            print("Starting with empty library...")
+        finally:
+            # Rank whatever was loaded, even if a bad record stopped the load early
+            self._build_top_rankings()
     
     def save_data(self):
-        """Save data to JSON file"""
-        data = {
-            'users': {username: user.to_dict() for username, user in self.users.items()},
-            'resources': {resource_id: resource.to_dict() for resource_id, resource in self.resources.items()}
-        }
-        
-        try:
-            with open(self.data_file, 'w') as f:
-                json.dump(data, f, indent=2)
-        except Exception as e:
-            print(f"Error saving data: {e}")
+        """Queue a snapshot of the library data for the background writer"""
+        self._start_writer()
+        with self._save_lock:
+            self._dirty = False
+            self._last_save = time.monotonic()
+            data = {
+                'users': {username: user.to_dict() for username, user in self.users.items()},
+                'resources': {resource_id: resource.to_dict() for resource_id, resource in self.resources.items()}
+            }
+            
+            # Only the newest snapshot matters, so replace one still waiting to be written
+            try:
+                self._write_queue.get_nowait()
+                self._write_queue.task_done()
+            except queue.Empty:
+                pass
+            self._write_queue.put((os.path.abspath(self.data_file), data))
+    
+    def _start_writer(self):
+        """Start the background writer thread if it is not running yet"""
+        if self._writer is None:
+            self._writer = threading.Thread(target=self._writer_loop, daemon=True)
+            self._writer.start()
+    
+    def _writer_loop(self):
+        """Write queued snapshots to disk off the interface thread"""
+        while True:
+            try:
+                path, data = self._write_queue.get(timeout=self.AUTOSAVE_INTERVAL)
+            except queue.Empty:
+                # Nothing was saved for a whole interval, so checkpoint any changes now
+                if self._dirty:
+                    try:
+                        self.save_data()
+                    except RuntimeError:
+                        # The library changed mid-snapshot; try again next interval
+                        self._dirty = True
+                continue
+            try:
+                # Write to a temporary file and swap it in, so a crash never leaves a partial file
+                tmp_path = path + ".tmp"
+                with open(tmp_path, 'wb') as f:
+                    f.write(_dumps(data))
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, path)
+            except Exception as e:
+                print(f"Error saving data: {e}")
+            finally:
+                self._write_queue.task_done()
+    
+    def mark_dirty(self):
+        """Record unsaved changes, saving them if the last save is old enough"""
+        self._start_writer()
+        self._dirty = True
+        if time.monotonic() - self._last_save >= self.AUTOSAVE_INTERVAL:
+            self.save_data()
+    
+    def flush(self):
+        """Save any unsaved changes and wait until they are on disk"""
+        if self._dirty:
+            self.save_data()
+        self._write_queue.join()
     
     def register_user(self, username: str, password: str, email: str = "") -> bool:
         """Register a new user"""
         if username in self.users:
             return False
         
-        self.users[username] = User(username, password, email)
-        self.save_data()
+        self._add_user(User(username, password, email))
+        self.mark_dirty()
+        return True
+    
+    def add_admin(self, username: str, password: str, email: str = "") -> bool:
+        """Create a new admin account"""
+        if username in self.users:
+            return False
+        
+        self._add_user(User(username, password, email, "admin"))
+        self.mark_dirty()
         return True
     
+    def remove_user(self, username: str) -> bool:
+        """Remove a user account"""
+        return bool(self.remove_users([username]))
+    
+    def remove_users(self, usernames: List[str]) -> List[str]:
+        """Remove several user accounts, returning the usernames that were removed"""
+        removed = [self.users.pop(username) for username in dict.fromkeys(usernames)
+                   if username in self.users]
+        if not removed:
+            return []
+        
+        removed_usernames = [user.username for user in removed]
+        removed_set = set(removed_usernames)
+        for role in {user.role for user in removed}:
+            self._user_index[role] = [user for user in self._user_index[role]
+                                      if user.username not in removed_set]
+        self._stats_version += 1
+        self.mark_dirty()
+        return removed_usernames
+    
+    def get_users_by_role(self, role: str) -> List[User]:
+        """Get all users with the given role"""
+        return self._user_index.get(role, [])
+    
+    def _add_user(self, user: User):
+        """Store a user and keep the role index in sync"""
+        self.users[user.username] = user
+        self._user_index.setdefault(user.role, []).append(user)
+        self._stats_version += 1
+    
     def login(self, username: str, password: str) -> bool:
         """Authenticate user login"""
-        if username in self.users and self.users[username].verify_password(password):
-            self.current_user = self.users[username]
+        user = self.users.get(username)
+        if user is not None and user.verify_password(password):
+            if user.needs_rehash():
+                # Upgrade a legacy or outdated hash now that the password is known
+                user.set_password(password)
+                self.mark_dirty()
+            self.current_user = user
             return True
         return False
     
     def logout(self):
         """Logout current user"""
         self.current_user = None
+        self.flush()
     
     def add_resource(self, title: str, author: str, subject: str, language: str, 
                     file_path: str, category: str = "Core Subjects", description: str = "") -> str:
         """Add a new resource to the library"""
         resource = Resource(title, author, subject, language, file_path, category, description)
+        while resource.id in self.resources:
+            resource.id = resource._generate_id()
         self.resources[resource.id] = resource
-        self.save_data()
+        self._resource_order[resource.id] = len(self._resource_order)
+        self._bump_top(self._top_downloads, resource.download_count, resource.id)
+        self._bump_top(self._top_views, resource.view_count, resource.id)
+        self._stats_version += 1
+        self._catalog_version += 1
+        self._index_added_resource(resource, self._catalog_version - 1)
+        self.mark_dirty()
         return resource.id
     
+    def update_resource(self, resource_id: str, **fields) -> bool:
+        """Update the given fields of an existing resource"""
+        resource = self.resources.get(resource_id)
+        if resource is None:
+            return False
+        
+        for name, value in fields.items():
+            setattr(resource, name, value)
+        resource.refresh_cached_fields()
+        self._stats_version += 1
+        self._catalog_version += 1
+        self.mark_dirty()
+        return True
+    
     def search_resources(self, keyword: str) -> List[Resource]:
         """Search resources by keyword"""
-        results = []
         keyword_lower = keyword.lower()
+        if not keyword_lower:
+            return list(self.resources.values())
+        
+        # Results stay valid until the next add or edit changes the catalog version
+        if self._search_cache is None or self._search_cache[0] != self._catalog_version:
+            self._search_cache = (self._catalog_version, {})
+        cache = self._search_cache[1]
+        
+        results = cache.get(keyword_lower)
+        if results is None:
+            if len(keyword_lower) < 3:
+                candidates = self.resources.values()
+            else:
+                candidates = self._search_candidates(keyword_lower)
+            
+            results = [resource for resource in candidates if keyword_lower in resource.search_text]
+            if len(cache) >= self.SEARCH_CACHE_SIZE:
+                cache.clear()
+            cache[keyword_lower] = results
         
-        for resource in self.resources.values():
-            if (keyword_lower in resource.title.lower() or 
-                keyword_lower in resource.author.lower() or 
-                keyword_lower in resource.subject.lower() or
-                keyword_lower in resource.language.lower()):
-                results.append(resource)
+        return list(results)
+    
+    def _search_candidates(self, keyword_lower: str) -> List[Resource]:
+        """Get the resources whose search text contains every trigram of a keyword"""
+        if self._search_index is None or self._search_index[0] != self._catalog_version:
+            ordered = list(self.resources.values())
+            trigrams = {}
+            for position, resource in enumerate(ordered):
+                self._add_trigrams(trigrams, position, resource)
+            self._search_index = (self._catalog_version, ordered, trigrams)
+        
+        _, ordered, trigrams = self._search_index
+        postings = []
+        for i in range(len(keyword_lower) - 2):
+            positions = trigrams.get(keyword_lower[i:i + 3])
+            if positions is None:
+                return []
+            postings.append(positions)
+        
+        postings.sort(key=len)
+        # Positions keep the results in catalog order
+        return [ordered[position] for position in sorted(postings[0].intersection(*postings[1:]))]
+    
+    def _add_trigrams(self, trigrams: Dict[str, set], position: int, resource: Resource):
+        """Record a resource's position under each trigram of its search text"""
+        text = resource.search_text
+        for gram in {text[i:i + 3] for i in range(len(text) - 2)}:
+            trigrams.setdefault(gram, set()).add(position)
+    
+    def _index_added_resource(self, resource: Resource, previous_version: int):
+        """Extend the category and search indexes with a new resource instead of rebuilding them"""
+        if self._category_index is not None and self._category_index[0] == previous_version:
+            by_category = self._category_index[1]
+            by_category.setdefault(resource.category, []).append(resource)
+            self._category_index = (self._catalog_version, by_category)
         
-        return results
+        if self._search_index is not None and self._search_index[0] == previous_version:
+            _, ordered, trigrams = self._search_index
+            self._add_trigrams(trigrams, len(ordered), resource)
+            ordered.append(resource)
+            self._search_index = (self._catalog_version, ordered, trigrams)
     
     def get_resources_by_category(self, category: str) -> List[Resource]:
         """Get all resources in a specific category"""
-        return [resource for resource in self.resources.values() 
-                if resource.category == category]
+        return list(self._resources_by_category().get(category, ()))
+    
+    def get_category_count(self, category: str) -> int:
+        """Get the number of resources in a specific category"""
+        return len(self._resources_by_category().get(category, ()))
+    
+    def _resources_by_category(self) -> Dict[str, List[Resource]]:
+        """Get the cached category grouping, rebuilding it after catalog changes"""
+        if self._category_index is None or self._category_index[0] != self._catalog_version:
+            by_category = {}
+            for resource in self.resources.values():
+                by_category.setdefault(resource.category, []).append(resource)
+            self._category_index = (self._catalog_version, by_category)
+        
+        return self._category_index[1]
     
     def view_resource(self, resource_id: str):
         """Open a resource for viewing"""
         if resource_id in self.resources:
             resource = self.resources[resource_id]
             resource.view_count += 1
+            self._bump_top(self._top_views, resource.view_count, resource_id)
+            self._stats_version += 1
             
             if self.current_user:
-                if resource_id not in self.current_user.reading_history:
-                    self.current_user.reading_history.append(resource_id)
+                # Re-reading keeps the resource at its first position in the history
+                self.current_user.reading_history[resource_id] = None
             
-            self.save_data()
+            self.mark_dirty()
             
             # Try to open the file/URL
             file_path = resource.file_path
             
             # Check if it's a URL
-            if self._is_url(file_path):
+            if resource.is_remote:
                 try:
+                    import webbrowser
+                    
                     webbrowser.open(file_path)
                     return f"Opening '{resource.title}' in your web browser..."
                 except Exception as e:
@@ -259,23 +567,27 @@ class ELibrary:
         if resource_id in self.resources:
             resource = self.resources[resource_id]
             resource.download_count += 1
+            self._bump_top(self._top_downloads, resource.download_count, resource_id)
+            self._stats_version += 1
             
             if self.current_user:
-                if resource_id not in self.current_user.reading_history:
-                    self.current_user.reading_history.append(resource_id)
+                # Re-reading keeps the resource at its first position in the history
+                self.current_user.reading_history[resource_id] = None
             
-            self.save_data()
+            self.mark_dirty()
             
             file_path = resource.file_path
             
             # Create downloads directory if it doesn't exist
-            downloads_dir = os.path.join(os.getcwd(), "downloads")
-            if not os.path.exists(downloads_dir):
-                os.makedirs(downloads_dir)
+            downloads_dir = self.downloads_dir
+            os.makedirs(downloads_dir, exist_ok=True)
             
             # If it's a URL, try to download it
-            if self._is_url(file_path):
+            if resource.is_remote:
+                partial_path = None
                 try:
+                    import shutil
+                    import urllib.error
                     import urllib.request
                     
                     # Get filename from URL or use title
@@ -283,16 +595,27 @@ class ELibrary:
                     download_path = os.path.join(downloads_dir, filename)
                     
                     print(f"Downloading from {file_path}...")
-                    urllib.request.urlretrieve(file_path, download_path)
+                    with urllib.request.urlopen(file_path) as response, open(download_path, 'wb') as f:
+                        partial_path = download_path
+                        shutil.copyfileobj(response, f, self.DOWNLOAD_CHUNK_SIZE)
+                        expected = response.headers.get('Content-Length')
+                        if expected is not None and f.tell() < int(expected):
+                            raise urllib.error.ContentTooShortError(
+                                f"retrieval incomplete: got only {f.tell()} out of {expected} bytes", None)
                     
                     return f"Downloaded '{resource.title}' to: {download_path}"
                     
                 except Exception as e:
+                    # Never leave a truncated file that looks like a finished download
+                    if partial_path is not None:
+                        os.remove(partial_path)
                     return f"Error downloading from URL: {str(e)}"
             
             # If it's a local file, copy it to downloads
-            elif os.path.exists(file_path):
+            else:
                 try:
+                    import shutil
+                    
                     filename = os.path.basename(file_path)
                     if not filename:
                         filename = f"{resource.title.replace(' ', '_')}.pdf"
@@ -302,10 +625,10 @@ class ELibrary:
                     
                     return f"Downloaded '{resource.title}' to: {download_path}"
                     
+                except FileNotFoundError:
+                    return f"File not found: {file_path}\nNote: This might be a placeholder path. Please check with the administrator."
                 except Exception as e:
                     return f"Error copying file: {str(e)}"
-            else:
-                return f"File not found: {file_path}\nNote: This might be a placeholder path. Please check with the administrator."
         
         return "Resource not found"
     
@@ -313,8 +636,8 @@ class ELibrary:
         """Add resource to user's favorites"""
         if self.current_user and resource_id in self.resources:
             if resource_id not in self.current_user.favorites:
-                self.current_user.favorites.append(resource_id)
-                self.save_data()
+                self.current_user.favorites[resource_id] = None
+                self.mark_dirty()
                 return True
         return False
     
@@ -328,42 +651,79 @@ class ELibrary:
     
     def get_usage_report(self) -> Dict:
         """Generate usage report for admin"""
+        if self._usage_report is not None and self._usage_report[0] == self._stats_version:
+            return self._usage_report[1]
+        
         total_resources = len(self.resources)
-        total_users = len([user for user in self.users.values() if user.role == 'student'])
+        total_users = len(self._user_index['student'])
         
         # Most downloaded resources
-        most_downloaded = sorted(self.resources.values(), 
-                               key=lambda x: x.download_count, reverse=True)[:5]
+        most_downloaded = self._top_resources(self._top_downloads, 'download_count')
         
         # Most viewed resources
-        most_viewed = sorted(self.resources.values(), 
-                           key=lambda x: x.view_count, reverse=True)[:5]
+        most_viewed = self._top_resources(self._top_views, 'view_count')
         
-        return {
+        report = {
             'total_resources': total_resources,
             'total_users': total_users,
             'most_downloaded': most_downloaded,
             'most_viewed': most_viewed
         }
+        self._usage_report = (self._stats_version, report)
+        return report
     
-    def _is_url(self, path: str) -> bool:
-        """Check if a path is a URL"""
-        try:
-            result = urlparse(path)
-            return all([result.scheme, result.netloc])
-        except:
-            return False
+    def _build_top_rankings(self):
+        """Rebuild the most downloaded/viewed rankings from all resources"""
+        self._resource_order = {resource_id: i for i, resource_id in enumerate(self.resources)}
+        resources = self.resources.values()
+        self._top_downloads = [(r.download_count, -self._resource_order[r.id], r.id) for r in
+                               heapq.nlargest(self.TOP_K, resources, key=attrgetter('download_count'))]
+        self._top_views = [(r.view_count, -self._resource_order[r.id], r.id) for r in
+                           heapq.nlargest(self.TOP_K, resources, key=attrgetter('view_count'))]
+        heapq.heapify(self._top_downloads)
+        heapq.heapify(self._top_views)
+    
+    def _bump_top(self, heap: list, count: int, resource_id: str):
+        """Record a new count for a resource in a bounded top-K min-heap"""
+        # Among equal counts the newest resource sorts lowest, so it is evicted first
+        entry = (count, -self._resource_order[resource_id], resource_id)
+        for i, (_, _, ranked_id) in enumerate(heap):
+            if ranked_id == resource_id:
+                heap[i] = entry
+                heapq.heapify(heap)
+                return
+        
+        if len(heap) < self.TOP_K:
+            heapq.heappush(heap, entry)
+        elif entry > heap[0]:
+            heapq.heapreplace(heap, entry)
+    
+    def _top_resources(self, heap: list, count_attr: str, limit: int = 5) -> List[Resource]:
+        """Get the highest ranked resources from a top-K heap"""
+        ranked = [self.resources[resource_id] for _, _, resource_id in heap]
+        ranked.sort(key=lambda resource: (-getattr(resource, count_attr),
+                                          self._resource_order[resource.id]))
+        return ranked[:limit]
     
     def _open_file(self, file_path: str):
         """Open a file with the default system application"""
+        if self._file_opener is None:
+            self._file_opener = self._resolve_file_opener()
+        self._file_opener(file_path)
+    
+    def _resolve_file_opener(self):
+        """Get the function that opens files with this platform's default application"""
+        import platform
+        import subprocess
+        
         system = platform.system()
         
         if system == "Windows":
-            os.startfile(file_path)
+            return os.startfile
         elif system == "Darwin":  # macOS
-            subprocess.run(["open", file_path])
+            return lambda file_path: subprocess.run(["open", file_path])
         else:  # Linux and other Unix-like systems
-            subprocess.run(["xdg-open", file_path])
+            return lambda file_path: subprocess.run(["xdg-open", file_path])
     
     def _get_filename_from_url(self, url: str, title: str) -> str:
         """Extract filename from URL or create one from title"""
@@ -376,5 +736,5 @@ class ELibrary:
             pass
         
         # If no filename found, create one from title
-        safe_title = "".join(c for c in title if c.isalnum() or c in (' ', '-', '_')).rstrip()
+        safe_title = title.translate(_SAFE_FILENAME_CHARS).rstrip()
         return f"{safe_title.replace(' ', '_')}.pdf"
\ No newline at end of file
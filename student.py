@@ -5,9 +5,30 @@ Community E-Library System - Student Interface
 Contains all student-related functionality and interface methods
 """
 
+import sys
 from typing import List
 from storage import Resource
 
+_GUEST_MENU = (
+    "\n1. Register new account\n"
+    "2. Continue as guest\n"
+)
+
+_MAIN_MENU = (
+    "\n1. Browse Categories\n"
+    "2. Search Library\n"
+    "3. View Favorites\n"
+    "4. Logout\n"
+)
+
+_ACTIONS_MENU = (
+    "\nChoose an action:\n"
+    "1. View Online\n"
+    "2. Download File\n"
+    "3. Add to Favorites\n"
+    "4. Return to Library\n"
+)
+
 class StudentInterface:
     """Student interface functionality for the library system"""
     
@@ -29,8 +50,7 @@ class StudentInterface:
                     if not self.student_login():
                         continue
                 elif registered == 'N':
-                    print("\n1. Register new account")
-                    print("2. Continue as guest")
+                    sys.stdout.write(_GUEST_MENU)
                     
                     choice = self.cli.get_input("Enter your choice: ", int)
                     
@@ -103,10 +123,7 @@ class StudentInterface:
             else:
                 print("Browsing as: Guest")
             
-            print("\n1. Browse Categories")
-            print("2. Search Library")
-            print("3. View Favorites")
-            print("4. Logout")
+            sys.stdout.write(_MAIN_MENU)
             
             choice = self.cli.get_input("\nEnter your choice: ", int)
             
@@ -130,7 +147,7 @@ class StudentInterface:
             self.cli.display_header("Browse Categories")
             
             for i, category in enumerate(self.library.categories, 1):
-                resource_count = len(self.library.get_resources_by_category(category))
+                resource_count = self.library.get_category_count(category)
                 print(f"{i}. {category} ({resource_count} resources)")
             
             print(f"{len(self.library.categories) + 1}. Return to Main Menu")
@@ -171,13 +188,15 @@ class StudentInterface:
                 input("Press Enter to return...")
                 break
             
-            for i, resource in enumerate(resources, 1):
-                print(f"{i}. {resource.title}")
-                print(f"   Author: {resource.author}")
-                print(f"   Subject: {resource.subject}")
-                print(f"   Language: {resource.language}")
-                print(f"   Downloads: {resource.download_count} | Views: {resource.view_count}")
-                print()
+            sys.stdout.write("".join(
+                f"{i}. {resource.title}\n"
+                f"   Author: {resource.author}\n"
+                f"   Subject: {resource.subject}\n"
+                f"   Language: {resource.language}\n"
+                f"   Downloads: {resource.download_count} | Views: {resource.view_count}\n"
+                "\n"
+                for i, resource in enumerate(resources, 1)
+            ))
             
             print(f"{len(resources) + 1}. Return to previous menu")
             
@@ -197,18 +216,14 @@ class StudentInterface:
             self.cli.clear_screen()
             self.cli.display_header(f"Resource: {resource.title}")
             
-            print(f"Author: {resource.author}")
-            print(f"Subject: {resource.subject}")
-            print(f"Language: {resource.language}")
-            print(f"Category: {resource.category}")
-            print(f"Description: {resource.description}")
-            print(f"Downloads: {resource.download_count} | Views: {resource.view_count}")
-            
-            print("\nChoose an action:")
-            print("1. View Online")
-            print("2. Download File")
-            print("3. Add to Favorites")
-            print("4. Return to Library")
+            sys.stdout.write(f"Author: {resource.author}\n"
+                             f"Subject: {resource.subject}\n"
+                             f"Language: {resource.language}\n"
+                             f"Category: {resource.category}\n"
+                             f"Description: {resource.description}\n"
+                             f"Downloads: {resource.download_count} | Views: {resource.view_count}\n")
+            
+            sys.stdout.write(_ACTIONS_MENU)
             
             choice = self.cli.get_input("\nEnter your choice: ", int)
             